@@ -15,6 +15,12 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Migrate another database (e.g. a conversation shard) with:
+#   alembic -x db_url=postgresql://... upgrade head
+db_url = context.get_x_argument(as_dictionary=True).get("db_url")
+if db_url:
+    config.set_main_option("sqlalchemy.url", db_url)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -0,0 +1,42 @@
+"""create review volume rollups
+
+Revision ID: b3f1c8a2d5e7
+Revises: 7a7d644b8a33
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c8a2d5e7'
+down_revision: Union[str, Sequence[str], None] = '7a7d644b8a33'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('review_volume_rollups',
+    sa.Column('rollup_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('bucket', sa.String(length=8), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('product_name', sa.String(length=256), nullable=False),
+    sa.Column('review_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('rollup_id'),
+    sa.UniqueConstraint('bucket', 'product_name', 'bucket_start', name='uq_review_volume_bucket_product_start')
+    )
+    op.create_index('ix_review_volume_bucket_start', 'review_volume_rollups', ['bucket', 'bucket_start'], unique=False)
+    op.create_index('ix_reviews_product_name_created_at', 'reviews', ['product_name', 'created_at'], unique=False)
+    # Fill the rollups from existing reviews afterwards:
+    #   python -m app.scripts.backfill_review_rollups
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_product_name_created_at', table_name='reviews')
+    op.drop_index('ix_review_volume_bucket_start', table_name='review_volume_rollups')
+    op.drop_table('review_volume_rollups')
@@ -0,0 +1,152 @@
+from collections import Counter
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.review import Review
+from app.models.review_volume import ReviewVolume
+
+BUCKETS = ("hour", "day")
+
+_table = ReviewVolume.__table__
+
+# Rows per upsert statement (4 parameters each, well under driver limits)
+UPSERT_CHUNK_SIZE = 1000
+
+
+def bucket_start(value: datetime, bucket: str) -> datetime:
+    if bucket == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _dialect_name(db: Session | Connection) -> str:
+    bind = db.get_bind() if isinstance(db, Session) else db
+    return bind.dialect.name
+
+
+def _upsert_counts(db: Session | Connection, counts: Counter) -> None:
+    rows = [
+        {"bucket": bucket, "bucket_start": start, "product_name": product, "review_count": count}
+        for (bucket, start, product), count in counts.items()
+        if count
+    ]
+    if not rows:
+        return
+    # Postgres locks conflicting rows in VALUES order: a fixed order keeps concurrent
+    # writers (e.g. a move A->B and a move B->A) from deadlocking each other
+    rows.sort(key=lambda row: (row["bucket"], row["product_name"], row["bucket_start"]))
+
+    dialect = _dialect_name(db)
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            statement = insert(_table).values(rows[i:i + UPSERT_CHUNK_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=["bucket", "product_name", "bucket_start"],
+                set_={"review_count": _table.c.review_count + statement.excluded.review_count},
+            )
+            db.execute(statement)
+        return
+
+    # Other databases: update, then insert the buckets that did not exist yet
+    for row in rows:
+        result = db.execute(
+            update(_table)
+            .where(
+                _table.c.bucket == row["bucket"],
+                _table.c.product_name == row["product_name"],
+                _table.c.bucket_start == row["bucket_start"],
+            )
+            .values(review_count=_table.c.review_count + row["review_count"])
+        )
+        if result.rowcount == 0:
+            db.execute(_table.insert().values(row))
+
+
+def _count_buckets(counts: Counter, reviews: Iterable[tuple[str, datetime]], delta: int) -> None:
+    for product_name, created_at in reviews:
+        if created_at is None:
+            continue
+        for bucket in BUCKETS:
+            counts[(bucket, bucket_start(created_at, bucket), product_name)] += delta
+
+
+def add_review_volume(db: Session | Connection, reviews: Iterable[tuple[str, datetime]], delta: int = 1) -> None:
+    """
+    Add `delta` to the hour and day buckets of each (product_name, created_at).
+
+    Runs in the caller's transaction as a single upsert statement, so the rollups
+    commit or roll back together with the reviews.
+    """
+    counts = Counter()
+    _count_buckets(counts, reviews, delta)
+    _upsert_counts(db, counts)
+
+
+def move_review_volume(db: Session | Connection, created_at: datetime, old_product: str, new_product: str) -> None:
+    """Move one review between products: both sides go in the same upsert statement."""
+    counts = Counter()
+    _count_buckets(counts, [(old_product, created_at)], -1)
+    _count_buckets(counts, [(new_product, created_at)], 1)
+    _upsert_counts(db, counts)
+
+
+def get_review_volume(
+    db: Session,
+    bucket: str,
+    product_name: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+):
+    # Buckets whose reviews were all deleted or moved stay in the table at zero
+    query = db.query(ReviewVolume).filter(ReviewVolume.bucket == bucket, ReviewVolume.review_count > 0)
+    if product_name:
+        query = query.filter(ReviewVolume.product_name == product_name)
+    if start:
+        query = query.filter(ReviewVolume.bucket_start >= bucket_start(start, bucket))
+    if end:
+        query = query.filter(ReviewVolume.bucket_start < end)
+    return query.order_by(ReviewVolume.bucket_start, ReviewVolume.product_name).all()
+
+
+def _bucket_expression(dialect: str, bucket: str):
+    if dialect == "postgresql":
+        return func.date_trunc(bucket, Review.created_at)
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%d %H:00:00" if bucket == "hour" else "%Y-%m-%d 00:00:00", Review.created_at)
+    return None
+
+
+def rebuild_review_volume(connection: Connection) -> int:
+    """Recompute every rollup from reviews.created_at; returns the number of buckets written."""
+    connection.execute(_table.delete())
+    dialect = connection.dialect.name
+    written = 0
+    for bucket in BUCKETS:
+        expression = _bucket_expression(dialect, bucket)
+        counts = Counter()
+        if expression is not None:
+            result = connection.execute(
+                select(expression, Review.product_name, func.count())
+                .where(Review.created_at.is_not(None))
+                .group_by(expression, Review.product_name)
+            )
+            for start, product_name, count in result:
+                if isinstance(start, str):
+                    start = datetime.fromisoformat(start)
+                counts[(bucket, start, product_name)] = count
+        else:
+            # No date truncation function known: group while streaming the rows
+            result = connection.execution_options(yield_per=10000).execute(
+                select(Review.product_name, Review.created_at).where(Review.created_at.is_not(None))
+            )
+            for product_name, created_at in result:
+                counts[(bucket, bucket_start(created_at, bucket), product_name)] += 1
+        _upsert_counts(connection, counts)
+        written += len(counts)
+    return written
@@ -1,14 +1,23 @@
 from sqlalchemy.orm import Session
 from app.models.review import Review
 from app.schemas.review import ReviewCreate
+from app.service.review_events import publish_review_event
+from app.controllers.review_volume_crud import add_review_volume, move_review_volume
 
 
-def get_reviews(db: Session):
-    return db.query(Review).all()
+def _review_query(db: Session, fields: tuple[str, ...] | None):
+    # Only the requested columns are selected; rows are then plain tuples, not ORM objects
+    if fields:
+        return db.query(*[getattr(Review, name) for name in fields])
+    return db.query(Review)
 
 
-def get_review(db: Session, review_id: int):
-    return db.query(Review).filter(Review.review_id == review_id).first()
+def get_reviews(db: Session, fields: tuple[str, ...] | None = None):
+    return _review_query(db, fields).all()
+
+
+def get_review(db: Session, review_id: int, fields: tuple[str, ...] | None = None):
+    return _review_query(db, fields).filter(Review.review_id == review_id).first()
 
 
 def create_review(db: Session, data: ReviewCreate):
@@ -21,6 +30,9 @@ def create_review(db: Session, data: ReviewCreate):
         preferred_contact_again=data.preferred_contact_again
     )
     db.add(new_review)
+    db.flush()
+    add_review_volume(db, [(new_review.product_name, new_review.created_at)])
+    publish_review_event(db, "created", new_review)
     db.commit()
     db.refresh(new_review)
     return new_review
@@ -29,12 +41,16 @@ def create_review(db: Session, data: ReviewCreate):
 def update_review(db: Session, review_id: int, data: ReviewCreate):
     review = get_review(db, review_id)
     if review:
+        if review.product_name != data.product_name:
+            move_review_volume(db, review.created_at, review.product_name, data.product_name)
         review.contact_number = data.contact_number
         review.user_name = data.user_name
         review.product_name = data.product_name
         review.product_review = data.product_review
         review.preferred_contact_method = data.preferred_contact_method
         review.preferred_contact_again = data.preferred_contact_again
+        db.flush()
+        publish_review_event(db, "updated", review)
         db.commit()
         db.refresh(review)
         return review
@@ -43,7 +59,9 @@ def update_review(db: Session, review_id: int, data: ReviewCreate):
 def delete_review(db: Session, review_id: int):
     review = get_review(db, review_id)
     if review:
+        add_review_volume(db, [(review.product_name, review.created_at)], delta=-1)
         db.delete(review)
+        publish_review_event(db, "deleted", review_id=review_id)
         db.commit()
         return True
     return False
@@ -0,0 +1,200 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from itertools import islice
+from typing import IO, Iterable, Iterator
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import Engine
+
+from app.controllers.review_volume_crud import add_review_volume
+from app.models.review import Review
+from app.schemas.review import ReviewImport
+
+IMPORT_BATCH_SIZE = 5000
+
+# Columns written by the import, in COPY order (review_id comes from the sequence)
+IMPORT_COLUMNS = [
+    "contact_number",
+    "user_name",
+    "product_name",
+    "product_review",
+    "preferred_contact_method",
+    "preferred_contact_again",
+    "created_at",
+    "updated_at",
+]
+
+# VARCHAR limits of the reviews table: one oversized value would abort a whole COPY
+_MAX_LENGTHS = {
+    column.name: column.type.length
+    for column in Review.__table__.columns
+    if getattr(column.type, "length", None)
+}
+
+_batch_adapter = TypeAdapter(list[ReviewImport])
+
+
+def iter_import_rows(stream: IO[str], fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Yield (line_number, row, parse_error) for a CSV or NDJSON text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells are missing values, so schema defaults apply
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, "")}, None
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"invalid JSON: {e.msg}"
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _validate_batch(
+    batch: list[tuple[int, dict | None, str | None]],
+) -> tuple[list[tuple[int, dict | None, dict]], list[dict]]:
+    """Validate a whole batch in one pydantic call; returns ((line, raw, row) accepted, rejects)."""
+    rejects = []
+    candidates = []
+    for line_number, row, error in batch:
+        if error:
+            rejects.append({"line": line_number, "row": row, "errors": [error]})
+        else:
+            candidates.append((line_number, row))
+
+    raw_rows = [row for _, row in candidates]
+    try:
+        models = _batch_adapter.validate_python(raw_rows)
+    except ValidationError as e:
+        # Only batches with bad rows pay for a second pass over the good ones
+        errors_by_index: dict[int, list[str]] = {}
+        for err in e.errors():
+            index = err["loc"][0]
+            field = ".".join(str(part) for part in err["loc"][1:])
+            errors_by_index.setdefault(index, []).append(f"{field}: {err['msg']}" if field else err["msg"])
+        for index, errors in errors_by_index.items():
+            line_number, row = candidates[index]
+            rejects.append({"line": line_number, "row": row, "errors": errors})
+        candidates = [c for i, c in enumerate(candidates) if i not in errors_by_index]
+        models = _batch_adapter.validate_python([row for _, row in candidates])
+
+    now = datetime.utcnow()
+    accepted = []
+    for (line_number, raw), model in zip(candidates, models):
+        row = model.model_dump()
+        errors = [
+            f"{field}: longer than {limit} characters"
+            for field, limit in _MAX_LENGTHS.items()
+            if isinstance(row.get(field), str) and len(row[field]) > limit
+        ]
+        # PostgreSQL text can't hold NUL; one would fail the whole batch load
+        errors += [
+            f"{field}: contains a NUL character"
+            for field, value in row.items()
+            if isinstance(value, str) and "\x00" in value
+        ]
+        if errors:
+            rejects.append({"line": line_number, "row": raw, "errors": errors})
+            continue
+        created_at = row["created_at"] or now
+        if created_at.tzinfo is not None:
+            # The columns are timestamp without time zone, in UTC
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        row["created_at"] = created_at
+        row["updated_at"] = created_at
+        accepted.append((line_number, raw, row))
+    return accepted, rejects
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_rows(engine: Engine, rows: list[dict]) -> None:
+    """Load a batch with COPY FROM STDIN (PostgreSQL + psycopg2)."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_copy_value(row[column]) for column in IMPORT_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    # COPY runs on the DBAPI connection inside the SQLAlchemy transaction, so the
+    # rollup update below commits together with the rows
+    with engine.begin() as connection:
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Review.__tablename__} ({', '.join(IMPORT_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        add_review_volume(connection, [(row["product_name"], row["created_at"]) for row in rows])
+
+
+def _insert_rows(engine: Engine, rows: list[dict]) -> None:
+    """Fallback for other databases (e.g. SQLite): one batched executemany per batch."""
+    with engine.begin() as connection:
+        connection.execute(insert(Review.__table__), rows)
+        add_review_volume(connection, [(row["product_name"], row["created_at"]) for row in rows])
+
+
+def import_reviews(
+    engine: Engine,
+    rows: Iterable[tuple[int, dict | None, str | None]],
+    rejects_file: IO[str] | None = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    """
+    Validate and load review rows in batches of `batch_size`, committing each batch.
+
+    Memory stays bounded by one batch. Rejected rows, including rows the database
+    refuses, are written as NDJSON to `rejects_file` with their line number and errors.
+    """
+    use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+    load = _copy_rows if use_copy else _insert_rows
+    # COPY runs on the raw DBAPI cursor, so its errors are not wrapped by SQLAlchemy
+    load_errors = (SQLAlchemyError, engine.dialect.dbapi.Error)
+
+    inserted = 0
+    rejected = 0
+    iterator = iter(rows)
+    while batch := list(islice(iterator, batch_size)):
+        accepted, rejects = _validate_batch(batch)
+        if accepted:
+            try:
+                load(engine, [row for _, _, row in accepted])
+                inserted += len(accepted)
+            except load_errors:
+                # Find the rows the database refuses: retry the batch one row at a time
+                for line_number, raw, row in accepted:
+                    try:
+                        load(engine, [row])
+                        inserted += 1
+                    except load_errors as e:
+                        error = str(getattr(e, "orig", e)).strip().splitlines()[0]
+                        rejects.append({"line": line_number, "row": raw, "errors": [f"database: {error}"]})
+        rejected += len(rejects)
+        if rejects_file is not None:
+            for reject in rejects:
+                rejects_file.write(json.dumps(reject, default=str) + "\n")
+
+    return {"inserted": inserted, "rejected": rejected}
+
+
+def detect_format(filename: str | None) -> str:
+    """Guess the import format from a file name; CSV unless it looks like NDJSON."""
+    if filename and filename.lower().endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
@@ -0,0 +1,143 @@
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# A statement issued more times than this in one request is reported as a likely N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "3"))
+
+_installed_engines: set[int] = set()
+
+# Committed query budgets per endpoint, and per conversation step for the webhook.
+# Raising a budget must be a deliberate change: the tests in app/test enforce them.
+QUERY_BUDGETS = {
+    "POST /twilio/webhook": 3,  # restart command
+    "POST /twilio/webhook:waiting_name": 4,  # also covers a new contact (3)
+    "POST /twilio/webhook:waiting_product_name": 4,
+    "POST /twilio/webhook:waiting_product_review": 4,
+    "POST /twilio/webhook:waiting_contact_again": 8,
+    "POST /twilio/webhook:waiting_contact_method": 8,
+    "POST /twilio/webhook:completed": 1,
+    "GET /reviews/": 1,
+    "GET /reviews/{review_id}": 1,
+    "GET /reviews/timeseries": 1,
+    "POST /reviews/": 3,
+    "PUT /reviews/{review_id}": 4,  # 3 when the product does not change
+    "DELETE /reviews/{review_id}": 3,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def normalize_sql(statement: str) -> str:
+    """Reduce a statement to its shape: literals and IN lists become placeholders."""
+    statement = re.sub(r"%\(\w+\)s|\$\d+|(?<!:):\w+", "?", statement)
+    statement = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    statement = re.sub(r"\b\d+(?:\.\d+)?\b", "?", statement)
+    statement = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(?)", statement)
+    return " ".join(statement.split())
+
+
+def repeated_queries(statements, threshold: int = QUERY_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+    """Return (normalized statement, times) for the statements issued more than `threshold` times."""
+    counts = Counter(normalize_sql(statement) for statement in statements)
+    return [(statement, times) for statement, times in counts.most_common() if times > threshold]
+
+
+class QueryCount:
+    """Queries of one request, shared by every thread working on it."""
+
+    def __init__(self):
+        self.total = 0
+        # Raw statements; SQLAlchemy reuses the same string for a cached statement,
+        # so they are only normalized when reported
+        self.statements: Counter = Counter()
+
+    def add(self, statement: str) -> None:
+        self.total += 1
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+        return repeated_queries(self.statements.elements(), threshold)
+
+
+_query_counter: ContextVar[QueryCount | None] = ContextVar("query_counter", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.add(statement)
+
+
+def install_query_counter(engine: Engine) -> None:
+    """Register the cursor listener on the engine (idempotent)."""
+    if id(engine) in _installed_engines:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    _installed_engines.add(id(engine))
+
+
+def start_query_count() -> QueryCount:
+    """Start counting queries for the current request, or join the count already running."""
+    counter = _query_counter.get()
+    if counter is None:
+        counter = QueryCount()
+        _query_counter.set(counter)
+    return counter
+
+
+def get_query_count() -> int | None:
+    """Return the number of queries issued in the current request, if counting."""
+    counter = _query_counter.get()
+    return counter.total if counter is not None else None
+
+
+def query_budget(method: str, route_path: str, step=None) -> int | None:
+    """Return the committed budget for a route (and conversation step), if any."""
+    key = f"{method} {route_path}"
+    if step is not None:
+        step_key = f"{key}:{getattr(step, 'value', step)}"
+        if step_key in QUERY_BUDGETS:
+            return QUERY_BUDGETS[step_key]
+    return QUERY_BUDGETS.get(key)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, engine: Engine | None = None, max_repeats: int = QUERY_REPEAT_THRESHOLD):
+    """
+    Fail with QueryBudgetExceeded if the block issues more than `max_queries`
+    queries, or the same statement more than `max_repeats` times (N+1).
+
+    Counts every statement on the engine regardless of thread, so it also works
+    around requests made through the TestClient. Yields the list of statements
+    issued so far.
+    """
+    if engine is None:
+        from app.database.database import engine
+
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    repeated = repeated_queries(statements, max_repeats)
+    if len(statements) > max_queries or repeated:
+        listing = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(statements, 1))
+        message = f"Expected at most {max_queries} queries, got {len(statements)}:\n{listing}"
+        if repeated:
+            message += f"\nPossible N+1, statements repeated more than {max_repeats} times:\n"
+            message += "\n".join(f"  {times}x {sql}" for sql, times in repeated)
+        raise QueryBudgetExceeded(message)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database.database import DATABASE_URL, SessionLocal, engine
+
+# Comma-separated database URLs holding conversation_states. Unset means a single
+# shard: the main database. Shards may only be appended to this list; run
+# `python -m app.scripts.rebalance_shards` after adding one.
+CONVERSATION_SHARD_URLS = [
+    url.strip() for url in os.getenv("CONVERSATION_SHARD_URLS", "").split(",") if url.strip()
+]
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping & Veach): growing N to N+1 only moves 1/(N+1) of the keys."""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+def contact_key(contact_number: str) -> int:
+    # Python's hash() is randomized per process; the shard must be stable
+    return int.from_bytes(hashlib.blake2b(contact_number.encode(), digest_size=8).digest(), "big")
+
+
+class ShardRouter:
+    """Maps a contact number to the engine of the shard holding its conversation state."""
+
+    def __init__(self, engines: list[Engine]):
+        self.engines = engines
+        self._sessionmakers = [
+            sessionmaker(bind=shard_engine, autoflush=False, autocommit=False) for shard_engine in engines
+        ]
+
+    def shard_for(self, contact_number: str) -> int:
+        if len(self.engines) == 1:
+            return 0
+        return jump_hash(contact_key(contact_number), len(self.engines))
+
+    def engine_for(self, contact_number: str) -> Engine:
+        return self.engines[self.shard_for(contact_number)]
+
+    def session_for(self, contact_number: str) -> Session:
+        return self._sessionmakers[self.shard_for(contact_number)]()
+
+
+def _build_engines(urls: list[str]) -> list[Engine]:
+    # The main database can itself be one of the shards
+    return [engine if url == DATABASE_URL else create_engine(url) for url in urls]
+
+
+conversation_shards = ShardRouter(_build_engines(CONVERSATION_SHARD_URLS) if CONVERSATION_SHARD_URLS else [engine])
+
+
+@contextmanager
+def conversation_sessions(contact_number: str):
+    """
+    Yield (state_db, reviews_db) for a contact: its conversation shard and the
+    central database where reviews are stored. Without sharding both are the
+    same session, so a webhook request still uses a single connection.
+    """
+    state_db = conversation_shards.session_for(contact_number)
+    if state_db.get_bind() is engine:
+        try:
+            yield state_db, state_db
+        finally:
+            state_db.close()
+        return
+
+    reviews_db = SessionLocal()
+    try:
+        yield state_db, reviews_db
+    finally:
+        state_db.close()
+        reviews_db.close()
@@ -0,0 +1,175 @@
+import atexit
+import copy
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.middleware.request_context import get_request_tags
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Per-level sampling, e.g. "DEBUG=0.01,INFO=0.5". Levels not listed are always kept.
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+# Key of the contact ids in the logs. Without it a random key is used, so ids
+# only correlate lines within one process.
+LOG_CONTACT_HASH_KEY = os.getenv("LOG_CONTACT_HASH_KEY") or secrets.token_hex(32)
+
+# Fields passed through `extra=` that must never reach the output as-is
+REDACTED_FIELDS = ("message_body", "product_review")
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+
+
+def hash_contact(contact_number: str) -> str:
+    """
+    Keyed id for a contact, used to correlate its log lines.
+
+    Phone numbers are few enough to brute-force a plain hash, so the id is an
+    HMAC: it can't be traced back to the number without LOG_CONTACT_HASH_KEY.
+    """
+    digest = hmac.new(LOG_CONTACT_HASH_KEY.encode(), contact_number.encode(), hashlib.sha256)
+    return digest.hexdigest()[:12]
+
+
+def _parse_sample_rates(value: str) -> dict[int, float]:
+    rates = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        level, rate = item.split("=", 1)
+        rates[logging.getLevelName(level.strip().upper())] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of the records of the configured levels."""
+
+    def __init__(self, rates: dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the request correlation ids onto the record and redacts sensitive fields.
+
+    Runs in the calling thread, before the record is queued, because the request
+    context is not visible from the listener thread.
+    """
+
+    def filter(self, record):
+        tags = get_request_tags()
+        if tags:
+            record.request_id = tags.get("request_id")
+            record.contact_id = tags.get("contact_id")
+        for field in REDACTED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                setattr(record, field, f"[redacted len={len(str(value))}]")
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the queue is full.
+
+    `dropped` counts every dropped record; once the queue has room again a
+    warning with the number dropped since the last one is logged.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record):
+        # Render the message in the calling thread but keep the traceback in its
+        # own field instead of appending it to the message like QueueHandler does
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def _dropped_record(self) -> logging.LogRecord:
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f"{self._unreported} log records dropped, the log queue was full", None, None,
+        )
+        record.dropped_records = self._unreported
+        return record
+
+    def enqueue(self, record):
+        # Called under the handler lock, so the counters need no locking of their own
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self._dropped_record())
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+
+def setup_logging() -> QueueListener:
+    """
+    Send the `app` loggers through a bounded queue to a background thread that
+    writes JSON lines to stdout, so slow stdout never blocks a request.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(_parse_sample_rates(LOG_SAMPLE_RATES)))
+    queue_handler.addFilter(ContextFilter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(queue_handler)
+    app_logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
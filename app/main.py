@@ -1,7 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.reviews_router import router as reviews_router
+from app.routes.reviews_stream import router as reviews_stream
 from app.routes.twilio_webhook import router as twilio_webhook
+from app.database.database import engine
+from app.database.query_counter import install_query_counter
+from app.database.sharding import conversation_shards
+from app.middleware.profiler import ProfilerMiddleware, profiling_enabled
+from app.middleware.query_count import DEBUG, QueryCountMiddleware
+from app.middleware.correlation import CorrelationIdMiddleware
+from app.logging_config import setup_logging
+from app.middleware.admission import AdmissionRejected, admission_controller, admission_rejected_handler
+from app.service.review_events import start_review_event_bridge
+
+setup_logging()
 
 app = FastAPI(
     title="TWS Backend API",
@@ -31,9 +43,38 @@ app.add_middleware(
     expose_headers=["*"],  # Expose all headers
 )
 
+# Opt-in request profiling: only mounted when PROFILE_SECRET or PROFILE_SAMPLE_RATE is set,
+# so it costs nothing when disabled
+if profiling_enabled():
+    for shard_engine in [engine, *conversation_shards.engines]:
+        install_query_counter(shard_engine)
+    app.add_middleware(ProfilerMiddleware)
+
+# Debug mode: per-request query count in the X-Query-Count header, checked against QUERY_BUDGETS
+if DEBUG:
+    for shard_engine in [engine, *conversation_shards.engines]:
+        install_query_counter(shard_engine)
+    app.add_middleware(QueryCountMiddleware)
+
+# Outermost: opens the request context used for log correlation
+app.add_middleware(CorrelationIdMiddleware)
+
+# Load shedding for the webhook and the reviews API (see app/middleware/admission.py)
+app.add_exception_handler(AdmissionRejected, admission_rejected_handler)
+
+# Cross-worker review events over Postgres LISTEN/NOTIFY, if REVIEW_EVENTS_PG_CHANNEL is set
+start_review_event_bridge()
+
+# Before reviews_router, so /reviews/stream is not taken for a review id
+app.include_router(reviews_stream)
 app.include_router(reviews_router)
 app.include_router(twilio_webhook)
 
 @app.get("/")
 def root():
     return {"message": "API TWS_BACKEND is running"}
+
+
+@app.get("/admission")
+def admission_stats():
+    return admission_controller.stats()
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from twilio.twiml.messaging_response import MessagingResponse
+
+logger = logging.getLogger(__name__)
+
+# Defaults match SQLAlchemy's default pool (5 connections + 10 overflow): more
+# concurrent requests than that would only queue inside the pool.
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "15"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "30"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+CONTACT_RATE_PER_SECOND = float(os.getenv("CONTACT_RATE_PER_SECOND", "1"))
+CONTACT_BURST = float(os.getenv("CONTACT_BURST", "5"))
+CONTACT_BUCKETS_MAX = int(os.getenv("CONTACT_BUCKETS_MAX", "100000"))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, twiml: bool = False):
+        super().__init__(reason)
+        self.reason = reason
+        self.twiml = twiml
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded, time-limited wait queue.
+
+    Requests beyond `max_concurrency` wait for a slot; once `max_queue` requests
+    are waiting, or a request waits longer than `queue_timeout`, it is shed.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "queue_timeout": 0, "contact_rate": 0}
+
+    async def acquire(self) -> None:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.shed["queue_full"] += 1
+            raise AdmissionRejected("queue_full")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed["queue_timeout"] += 1
+            raise AdmissionRejected("queue_timeout")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+
+class ContactRateLimiter:
+    """Token bucket per contact; the least recently seen contacts are evicted first."""
+
+    def __init__(self, rate: float, burst: float, max_contacts: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_contacts = max_contacts
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def allow(self, contact: str) -> bool:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(contact, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[contact] = (tokens, now)
+        if len(self._buckets) > self.max_contacts:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+admission_controller = AdmissionController(
+    ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT
+)
+contact_rate_limiter = ContactRateLimiter(CONTACT_RATE_PER_SECOND, CONTACT_BURST, CONTACT_BUCKETS_MAX)
+
+# Built once: shedding must not cost more than serving
+_busy_twiml = MessagingResponse()
+_busy_twiml.message("We're receiving a lot of messages right now. Please wait a moment and send your message again.")
+BUSY_TWIML = str(_busy_twiml)
+
+
+async def admit_request():
+    """Dependency holding an admission slot for the duration of the endpoint."""
+    await admission_controller.acquire()
+    try:
+        yield
+    finally:
+        admission_controller.release()
+
+
+async def admit_webhook(request: Request):
+    """Same as admit_request, plus the per-contact token bucket; rejections answer with TwiML."""
+    form = await request.form()
+    contact = (form.get("From") or "").strip().lower()
+    if contact and not contact_rate_limiter.allow(contact):
+        admission_controller.shed["contact_rate"] += 1
+        raise AdmissionRejected("contact_rate", twiml=True)
+
+    try:
+        await admission_controller.acquire()
+    except AdmissionRejected as e:
+        e.twiml = True
+        raise
+    try:
+        yield
+    finally:
+        admission_controller.release()
+
+
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    logger.warning("Request shed", extra={"reason": exc.reason, "path": request.url.path})
+    headers = {"Retry-After": str(ADMISSION_RETRY_AFTER)}
+    if exc.twiml:
+        # A 503 would leave the WhatsApp user without any answer; ask them to wait instead
+        return Response(content=BUSY_TWIML, media_type="application/xml", headers=headers)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servicio saturado, intente de nuevo más tarde"},
+        headers=headers,
+    )
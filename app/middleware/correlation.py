@@ -0,0 +1,20 @@
+import uuid
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.middleware.request_context import start_request_tags
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+class CorrelationIdMiddleware(BaseHTTPMiddleware):
+    """Assigns a request id (or reuses the caller's) and returns it in X-Request-ID."""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        start_request_tags()["request_id"] = request_id
+
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
@@ -0,0 +1,295 @@
+import cProfile
+import functools
+import hmac
+import inspect
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.database.query_counter import start_query_count
+from app.middleware.request_context import start_request_tags
+
+PROFILE_HEADER = "X-Profile-Token"
+
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# "deterministic" (cProfile -> .pstats) or "sampling" (stack sampler -> speedscope JSON)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "deterministic").lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+# Before 3.12 cProfile hooks only the thread that enables it, so worker threads get
+# their own profiler. From 3.12 it runs on sys.monitoring: one profiler per process,
+# covering every thread, and enabling a second one raises ValueError.
+_PER_THREAD_CPROFILE = sys.version_info < (3, 12)
+
+
+def profiling_enabled() -> bool:
+    """The middleware is only mounted when a secret or a sample rate is configured."""
+    return bool(PROFILE_SECRET) or PROFILE_SAMPLE_RATE > 0
+
+
+class _StackSampler:
+    """Samples, at a fixed interval, the stacks of the threads working on one request."""
+
+    def __init__(self, interval: float, thread_ids: set[int]):
+        self.interval = interval
+        # Shared with the profile session: worker threads join and leave while sampling
+        self.thread_ids = thread_ids
+        self.frames: list[dict] = []
+        self._frame_index: dict[tuple, int] = {}
+        self.samples: dict[int, list[list[int]]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _frame_id(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = len(self.frames)
+            self._frame_index[key] = index
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame))
+                    frame = frame.f_back
+                if stack:
+                    stack.reverse()
+                    self.samples.setdefault(thread_id, []).append(stack)
+
+    def to_speedscope(self, name: str) -> dict:
+        interval_ms = self.interval * 1000
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": f"{name} (thread {thread_id})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": len(samples) * interval_ms,
+                "samples": samples,
+                "weights": [interval_ms] * len(samples),
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "tws_backend",
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+        }
+
+
+class _ProfileSession:
+    """
+    Profiling state of one request. It follows the request into the threadpool
+    through a context variable, see profile_in_worker.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.thread_ids = {threading.get_ident()}
+        self.worker_profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        if mode == "sampling":
+            self.profiler = _StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000, self.thread_ids)
+        else:
+            self.profiler = cProfile.Profile()
+
+    def start(self):
+        if self.mode == "sampling":
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.mode == "sampling":
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+
+    @contextmanager
+    def worker_thread(self):
+        """Profile the calling worker thread for the duration of the block."""
+        thread_id = threading.get_ident()
+        if self.mode != "sampling" and not _PER_THREAD_CPROFILE:
+            # The session profiler already sees this thread
+            yield
+            return
+        if self.mode == "sampling":
+            self.thread_ids.add(thread_id)
+            try:
+                yield
+            finally:
+                self.thread_ids.discard(thread_id)
+            return
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self.worker_profiles.append(profile)
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profiler)
+        for profile in self.worker_profiles:
+            stats.add(profile)
+        return stats
+
+
+_active_session: ContextVar[_ProfileSession | None] = ContextVar("profile_session", default=None)
+
+
+def profile_in_worker(func):
+    """
+    Make a sync function that runs in the threadpool visible to the request profiler.
+
+    Returns the function unchanged when profiling is not configured.
+    """
+    if not profiling_enabled() or inspect.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _active_session.get()
+        if session is None:
+            return func(*args, **kwargs)
+        with session.worker_thread():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route class that profiles sync endpoints in the worker thread that runs them."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, profile_in_worker(endpoint), **kwargs)
+
+
+def _slug(value) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(value)).strip("-") or "none"
+
+
+def _rotate(directory: str, max_files: int) -> None:
+    """Keep only the newest `max_files` profiles in the directory."""
+    entries = [os.path.join(directory, name) for name in os.listdir(directory)]
+    entries = [path for path in entries if os.path.isfile(path)]
+    entries.sort(key=os.path.getmtime)
+    for path in entries[:-max_files] if max_files > 0 else entries:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ProfilerMiddleware(BaseHTTPMiddleware):
+    """
+    Runs selected requests under a profiler and stores the result in PROFILE_DIR.
+
+    A request is profiled when it carries the PROFILE_HEADER with the configured
+    secret, or when it falls into PROFILE_SAMPLE_RATE. Only one request is
+    profiled at a time; concurrent candidates run unprofiled. The event loop
+    thread is profiled for the whole request, and worker threads while they run
+    code wrapped by profile_in_worker (sync endpoints of routers using
+    ProfiledRoute). On Python 3.12+ deterministic mode can't be limited to
+    threads and records every thread of the process while the request runs.
+    Files are tagged with route, conversation step and SQL query count.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._lock = threading.Lock()
+
+    def _should_profile(self, request: Request) -> bool:
+        token = request.headers.get(PROFILE_HEADER)
+        if PROFILE_SECRET and token and hmac.compare_digest(token, PROFILE_SECRET):
+            return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def dispatch(self, request: Request, call_next):
+        if not self._should_profile(request) or not self._lock.acquire(blocking=False):
+            return await call_next(request)
+
+        try:
+            tags = start_request_tags()
+            queries = start_query_count()
+            started = time.perf_counter()
+
+            session = _ProfileSession(PROFILE_MODE)
+            token = _active_session.set(session)
+            session.start()
+            try:
+                response = await call_next(request)
+            finally:
+                session.stop()
+                _active_session.reset(token)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", request.url.path)
+            await run_in_threadpool(
+                self._save,
+                session,
+                request.method,
+                route_path,
+                tags.get("conversation_step"),
+                queries.total,
+                elapsed_ms,
+            )
+        finally:
+            self._lock.release()
+
+        return response
+
+    def _save(self, session: _ProfileSession, method: str, route_path: str, step, query_count: int, elapsed_ms: float):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        parts = [
+            datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"),
+            method,
+            _slug(route_path),
+        ]
+        if step is not None:
+            parts.append(f"step-{_slug(getattr(step, 'value', step))}")
+        parts += [f"{query_count}q", f"{int(elapsed_ms)}ms"]
+        name = "_".join(parts)
+
+        if session.mode == "sampling":
+            path = os.path.join(PROFILE_DIR, f"{name}.speedscope.json")
+            with open(path, "w") as f:
+                json.dump(session.profiler.to_speedscope(f"{method} {route_path}"), f)
+        else:
+            session.stats().dump_stats(os.path.join(PROFILE_DIR, f"{name}.pstats"))
+
+        _rotate(PROFILE_DIR, PROFILE_MAX_FILES)
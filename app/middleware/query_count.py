@@ -0,0 +1,47 @@
+import logging
+import os
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.database.query_counter import query_budget, start_query_count
+from app.middleware.request_context import start_request_tags
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
+
+class QueryCountMiddleware(BaseHTTPMiddleware):
+    """
+    Debug-only middleware that reports the number of SQL queries of each request
+    in the X-Query-Count header and warns when a route exceeds its query budget
+    or repeats the same statement more than QUERY_REPEAT_THRESHOLD times.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        tags = start_request_tags()
+        counter = start_query_count()
+
+        response = await call_next(request)
+
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", request.url.path)
+        step = tags.get("conversation_step")
+        count = counter.total
+        response.headers[QUERY_COUNT_HEADER] = str(count)
+
+        budget = query_budget(request.method, route_path, step)
+        if budget is not None and count > budget:
+            logger.warning(
+                "Query budget exceeded for %s %s (step=%s): %d queries, budget %d",
+                request.method, route_path, getattr(step, "value", step), count, budget,
+            )
+        for statement, times in counter.repeated():
+            logger.warning(
+                "Possible N+1 in %s %s (step=%s): statement repeated %d times: %s",
+                request.method, route_path, getattr(step, "value", step), times, statement,
+            )
+        return response
@@ -0,0 +1,27 @@
+from contextvars import ContextVar
+
+# Per-request tags (route, conversation step, query count, ...).
+# The value is a mutable dict so that code running in the threadpool, which
+# receives a copy of the context, still writes into the same request's tags.
+_request_tags: ContextVar[dict | None] = ContextVar("request_tags", default=None)
+
+
+def start_request_tags() -> dict:
+    """Open a tag dict for the current request, or join the one already open."""
+    tags = _request_tags.get()
+    if tags is None:
+        tags = {}
+        _request_tags.set(tags)
+    return tags
+
+
+def get_request_tags() -> dict | None:
+    """Return the tags of the current request, or None outside a tagged request."""
+    return _request_tags.get()
+
+
+def tag_request(**tags) -> None:
+    """Attach tags to the current request. No-op when nobody is collecting them."""
+    current = _request_tags.get()
+    if current is not None:
+        current.update(tags)
@@ -1,4 +1,5 @@
 from app.models.review import Review
 from app.models.conversation_state import ConversationState
+from app.models.review_volume import ReviewVolume
 
-allModels = [Review, ConversationState]
\ No newline at end of file
+allModels = [Review, ConversationState, ReviewVolume]
\ No newline at end of file
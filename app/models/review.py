@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index
 from datetime import datetime
 from app.database.database import Base
 
@@ -14,3 +14,8 @@ class Review(Base):
     preferred_contact_again = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Time series per product (see review_volume_rollups)
+    __table_args__ = (
+        Index("ix_reviews_product_name_created_at", "product_name", "created_at"),
+    )
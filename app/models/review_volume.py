@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
+from app.database.database import Base
+
+
+class ReviewVolume(Base):
+    """Number of reviews per product and hour/day bucket, kept up to date on every review write."""
+    __tablename__ = "review_volume_rollups"
+
+    rollup_id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket = Column(String(8), nullable=False)  # "hour" or "day"
+    bucket_start = Column(DateTime, nullable=False)
+    product_name = Column(String(256), nullable=False)
+    review_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("bucket", "product_name", "bucket_start", name="uq_review_volume_bucket_product_start"),
+        Index("ix_review_volume_bucket_start", "bucket", "bucket_start"),
+    )
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+import io
+import os
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 from sqlalchemy.orm import Session
 
-from app.database.database import SessionLocal
-from app.schemas.review import ReviewCreate, ReviewResponse
+from app.database.database import SessionLocal, engine
+from app.middleware.admission import admit_request
+from app.middleware.profiler import ProfiledRoute
+from app.schemas.review import ReviewCreate, ReviewResponse, ReviewVolumeResponse, review_fields_adapter
 from app.controllers.reviews_crud import (
     create_review,
     get_reviews,
@@ -10,8 +17,17 @@ from app.controllers.reviews_crud import (
     update_review as update_review_crud,
     delete_review
 )
+from app.controllers.review_volume_crud import get_review_volume
+from app.controllers.reviews_import import detect_format, import_reviews, iter_import_rows
+
+IMPORT_REJECTS_DIR = os.getenv("IMPORT_REJECTS_DIR", "import_rejects")
 
-router = APIRouter(prefix="/reviews", tags=["Reviews"])
+router = APIRouter(
+    prefix="/reviews",
+    tags=["Reviews"],
+    dependencies=[Depends(admit_request)],
+    route_class=ProfiledRoute,
+)
 
 def get_db():
     db = SessionLocal()
@@ -21,16 +37,55 @@ def get_db():
         db.close()
 
 
+FIELDS_DESCRIPTION = "Comma-separated subset of fields to return, e.g. review_id,product_name,created_at"
+
+
+def parse_fields(fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION)) -> tuple[str, ...] | None:
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    invalid = requested - ReviewResponse.model_fields.keys()
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(sorted(invalid))}")
+    # Canonical order, so every combination maps to one cached serializer
+    return tuple(name for name in ReviewResponse.model_fields if name in requested)
+
+
+def sparse_response(data, fields: tuple[str, ...], many: bool) -> Response:
+    adapter = review_fields_adapter(fields, many)
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(data, from_attributes=True)),
+        media_type="application/json",
+    )
+
+
 @router.get("/", response_model=list[ReviewResponse])
-def list_reviews(db: Session = Depends(get_db)):
-    return get_reviews(db)
+def list_reviews(fields: tuple[str, ...] | None = Depends(parse_fields), db: Session = Depends(get_db)):
+    reviews = get_reviews(db, fields)
+    if fields:
+        return sparse_response(reviews, fields, many=True)
+    return reviews
+
+
+@router.get("/timeseries", response_model=list[ReviewVolumeResponse])
+def review_timeseries(
+    bucket: Literal["hour", "day"] = "day",
+    product: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: Session = Depends(get_db),
+):
+    """Reviews per product and hour/day, read from the rollup table."""
+    return get_review_volume(db, bucket, product, start, end)
 
 
 @router.get("/{review_id}", response_model=ReviewResponse)
-def read_review(review_id: int, db: Session = Depends(get_db)):
-    review = get_review(db, review_id)
+def read_review(review_id: int, fields: tuple[str, ...] | None = Depends(parse_fields), db: Session = Depends(get_db)):
+    review = get_review(db, review_id, fields)
     if not review:
         raise HTTPException(status_code=404, detail="Review no encontrada")
+    if fields:
+        return sparse_response(review, fields, many=False)
     return review
 
 
@@ -39,6 +94,23 @@ def create_new_review(data: ReviewCreate, db: Session = Depends(get_db)):
     return create_review(db, data)
 
 
+@router.post("/import")
+def import_reviews_file(file: UploadFile = File(...), format: str | None = None):
+    fmt = format or detect_format(file.filename)
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Formato no soportado, use csv o ndjson")
+
+    os.makedirs(IMPORT_REJECTS_DIR, exist_ok=True)
+    rejects_path = os.path.join(
+        IMPORT_REJECTS_DIR, f"rejects_{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}.ndjson"
+    )
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    with open(rejects_path, "w") as rejects_file:
+        result = import_reviews(engine, iter_import_rows(stream, fmt), rejects_file)
+
+    return {**result, "rejects_file": rejects_path}
+
+
 @router.put("/{review_id}", response_model=ReviewResponse)
 def update_review(review_id: int, data: ReviewCreate, db: Session = Depends(get_db)):
     updated = update_review_crud(db, review_id, data)
@@ -0,0 +1,45 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+
+from app.service.review_events import broker
+
+REVIEW_STREAM_KEEPALIVE = float(os.getenv("REVIEW_STREAM_KEEPALIVE", "15"))
+
+# Separate from reviews_router: a stream must not hold an admission slot while it is open
+router = APIRouter(prefix="/reviews", tags=["Reviews"])
+
+
+async def _event_stream(queue: asyncio.Queue):
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), REVIEW_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is None:
+                # Dropped for falling behind; the client reconnects with Last-Event-ID
+                break
+            yield message
+    finally:
+        broker.unsubscribe(queue)
+
+
+@router.get("/stream")
+async def stream_reviews(last_event_id: str | None = Header(default=None)):
+    """Server-Sent Events feed of created, updated and deleted reviews."""
+    queue = broker.subscribe(last_event_id)
+    return StreamingResponse(
+        _event_stream(queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stream/stats")
+def stream_stats():
+    return broker.stats()
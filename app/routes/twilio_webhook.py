@@ -1,22 +1,22 @@
+import logging
+
 from fastapi import APIRouter, Request, Depends, Response
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from twilio.twiml.messaging_response import MessagingResponse
 
-from app.database.database import SessionLocal
+from app.database.sharding import conversation_sessions
 from app.service.conversation_service import process_message, handle_restart_command
+from app.logging_config import hash_contact
+from app.middleware.admission import admit_webhook
+from app.middleware.profiler import profile_in_worker
+from app.middleware.request_context import tag_request
 
-router = APIRouter(prefix="/twilio", tags=["Twilio"])
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+logger = logging.getLogger(__name__)
 
+router = APIRouter(prefix="/twilio", tags=["Twilio"], dependencies=[Depends(admit_webhook)])
 
 @router.post("/webhook")
-async def twilio_webhook(request: Request, db: Session = Depends(get_db)):
+async def twilio_webhook(request: Request):
     form = await request.form()
 
     # Data sent by Twilio
@@ -29,17 +29,27 @@ async def twilio_webhook(request: Request, db: Session = Depends(get_db)):
         phone = phone.replace("whatsapp:", "", 1).replace("WhatsApp:", "", 1).replace("WHATSAPP:", "", 1)
     phone = phone.strip()
     
-    print(f"Message received from {phone}: {message}")
+    tag_request(contact_id=hash_contact(phone))
+    logger.info("Message received", extra={"message_body": message})
 
-    # Check for restart command (case insensitive)
-    if message.strip().lower() == "restart":
-        response_text = handle_restart_command(db, phone)
-    else:
-        # Process message through conversation flow
-        response_text, is_completed = process_message(db, phone, message)
+    # The database work blocks, so it runs in the threadpool: the event loop stays
+    # free to serve other requests and to time out the ones waiting for admission
+    response_text = await run_in_threadpool(_handle_message, phone, message)
 
     # Respond to WhatsApp
     twilio_resp = MessagingResponse()
     twilio_resp.message(response_text)
 
     return Response(content=str(twilio_resp), media_type="application/xml")
+
+
+@profile_in_worker
+def _handle_message(phone: str, message: str) -> str:
+    # The conversation state lives on the contact's shard, reviews on the main database
+    with conversation_sessions(phone) as (db, reviews_db):
+        # Check for restart command (case insensitive)
+        if message.strip().lower() == "restart":
+            return handle_restart_command(db, phone)
+        # Process message through conversation flow
+        response_text, is_completed = process_message(db, phone, message, reviews_db)
+        return response_text
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from functools import lru_cache
+from pydantic import BaseModel, TypeAdapter, create_model
 from datetime import datetime
 
 class ReviewBase(BaseModel):
@@ -14,6 +15,11 @@ class ReviewCreate(ReviewBase):
     pass
 
 
+class ReviewImport(ReviewCreate):
+    # Historical reviews keep their original date; empty means "now"
+    created_at: datetime | None = None
+
+
 class ReviewResponse(ReviewBase):
     review_id: int
     created_at: datetime
@@ -21,3 +27,26 @@ class ReviewResponse(ReviewBase):
 
     class Config:
         from_attributes = True
+
+
+class ReviewVolumeResponse(BaseModel):
+    bucket_start: datetime
+    product_name: str
+    review_count: int
+
+    class Config:
+        from_attributes = True
+
+
+@lru_cache(maxsize=128)
+def review_fields_adapter(fields: tuple[str, ...], many: bool) -> TypeAdapter:
+    """Serializer for a subset of ReviewResponse fields (one per field combination)."""
+    model = create_model(
+        "ReviewFields",
+        __config__={"from_attributes": True},
+        **{
+            name: (ReviewResponse.model_fields[name].annotation, ...)
+            for name in fields
+        },
+    )
+    return TypeAdapter(list[model] if many else model)
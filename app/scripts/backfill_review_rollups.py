@@ -0,0 +1,24 @@
+"""
+Rebuild review_volume_rollups from reviews.created_at.
+
+Run once after the migration that creates the table, or at any time to repair
+the rollups. The rebuild happens in one transaction; run it when few reviews
+are being written, since reviews saved meanwhile may be miscounted.
+
+    python -m app.scripts.backfill_review_rollups
+"""
+import sys
+
+from app.controllers.review_volume_crud import rebuild_review_volume
+from app.database.database import engine
+
+
+def main() -> int:
+    with engine.begin() as connection:
+        written = rebuild_review_volume(connection)
+    print(f"Wrote {written} review volume buckets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Bulk import of historical reviews from CSV or NDJSON.
+
+Usage:
+    python -m app.scripts.import_reviews reviews.csv --rejects rejects.ndjson
+    cat reviews.ndjson | python -m app.scripts.import_reviews - --format ndjson
+"""
+import argparse
+import sys
+
+from app.controllers.reviews_import import IMPORT_BATCH_SIZE, detect_format, import_reviews, iter_import_rows
+from app.database.database import engine
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import reviews from CSV or NDJSON")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--rejects", default="rejects.ndjson", help="file for rejected rows")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(None if args.path == "-" else args.path)
+    source = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8-sig")
+    try:
+        with open(args.rejects, "w") as rejects_file:
+            result = import_reviews(engine, iter_import_rows(source, fmt), rejects_file, args.batch_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print(f"Inserted {result['inserted']} reviews, rejected {result['rejected']} (see {args.rejects})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
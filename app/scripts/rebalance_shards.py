@@ -0,0 +1,141 @@
+"""
+Move conversation states to the shard their contact hashes to.
+
+Run after appending a database to CONVERSATION_SHARD_URLS (with jump hashing only
+about 1/N of the contacts move), or with --source to drain a database that is
+no longer a shard, e.g. the main database when sharding is first enabled:
+
+    python -m app.scripts.rebalance_shards --dry-run
+    python -m app.scripts.rebalance_shards --source postgresql://.../tws_db
+
+Re-running is safe. If a contact wrote to its new shard before being moved, the
+most recently updated state wins.
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.database.sharding import ShardRouter, conversation_shards
+from app.models.conversation_state import ConversationState
+
+REBALANCE_BATCH_SIZE = 1000
+
+_STATE_FIELDS = [
+    "contact_number",
+    "current_step",
+    "user_name",
+    "product_name",
+    "product_review",
+    "wants_contact_again",
+    "preferred_contact_method",
+    "created_at",
+    "updated_at",
+]
+
+
+def _last_change(state: ConversationState) -> datetime:
+    # Both timestamps are nullable: a state of unknown age counts as the oldest
+    return state.updated_at or state.created_at or datetime.min
+
+
+def _move_batch(source: Session, targets: list[Session], router: ShardRouter, states: list[ConversationState]) -> int:
+    by_target: dict[int, list[ConversationState]] = {}
+    for state in states:
+        by_target.setdefault(router.shard_for(state.contact_number), []).append(state)
+
+    moved = 0
+    for index, target_states in by_target.items():
+        target = targets[index]
+        # One lookup per target and batch instead of one per state
+        existing_states = {
+            existing.contact_number: existing
+            for existing in target.query(ConversationState).filter(
+                ConversationState.contact_number.in_([state.contact_number for state in target_states])
+            )
+        }
+        new_rows = []
+        for state in target_states:
+            existing = existing_states.get(state.contact_number)
+            if existing is None:
+                new_rows.append({field: getattr(state, field) for field in _STATE_FIELDS})
+            elif _last_change(existing) < _last_change(state):
+                for field in _STATE_FIELDS:
+                    setattr(existing, field, getattr(state, field))
+            source.delete(state)
+            moved += 1
+        if new_rows:
+            # Bulk insert: the ORM would send one INSERT ... RETURNING per state
+            target.execute(insert(ConversationState), new_rows)
+    # Target first: a crash in between leaves a duplicate, which the next run resolves
+    for target in targets:
+        target.commit()
+    source.commit()
+    return moved
+
+
+def rebalance(
+    router: ShardRouter,
+    extra_sources: list[Engine] | None = None,
+    batch_size: int = REBALANCE_BATCH_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """Move every misplaced state to its shard; returns {"scanned": n, "moved": m}."""
+    shard_urls = {str(shard_engine.url) for shard_engine in router.engines}
+    sources = [(index, shard_engine) for index, shard_engine in enumerate(router.engines)]
+    sources += [
+        (None, source_engine)
+        for source_engine in extra_sources or []
+        if str(source_engine.url) not in shard_urls
+    ]
+
+    scanned = 0
+    moved = 0
+    for source_index, source_engine in sources:
+        source = Session(bind=source_engine, autoflush=False)
+        targets = [Session(bind=shard_engine, autoflush=False) for shard_engine in router.engines]
+        try:
+            last_id = 0
+            while True:
+                batch = (
+                    source.query(ConversationState)
+                    .filter(ConversationState.state_id > last_id)
+                    .order_by(ConversationState.state_id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not batch:
+                    break
+                last_id = batch[-1].state_id
+                scanned += len(batch)
+                misplaced = [state for state in batch if router.shard_for(state.contact_number) != source_index]
+                if dry_run:
+                    moved += len(misplaced)
+                elif misplaced:
+                    moved += _move_batch(source, targets, router, misplaced)
+        finally:
+            for session in [source, *targets]:
+                session.close()
+
+    return {"scanned": scanned, "moved": moved}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Move conversation states to their shard")
+    parser.add_argument("--source", action="append", default=[], help="extra database to drain (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=REBALANCE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only count the states that would move")
+    args = parser.parse_args(argv)
+
+    extra_sources = [create_engine(url) for url in args.source]
+    result = rebalance(conversation_shards, extra_sources, args.batch_size, args.dry_run)
+    verb = "Would move" if args.dry_run else "Moved"
+    print(f"{verb} {result['moved']} of {result['scanned']} conversation states")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
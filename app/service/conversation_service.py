@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+import logging
 import re
 from app.models.conversation_state import ConversationStep
 from app.schemas.conversation_state import ConversationStateCreate, ConversationStateUpdate
@@ -9,6 +10,9 @@ from app.controllers.conversation_crud import (
 )
 from app.controllers.reviews_crud import create_review
 from app.schemas.review import ReviewCreate
+from app.middleware.request_context import tag_request
+
+logger = logging.getLogger(__name__)
 
 
 def _normalize_yes_no(message: str) -> str | None:
@@ -106,9 +110,12 @@ def _is_valid_contact_method(method: str) -> tuple[bool, str]:
     return True, ""
 
 
-def process_message(db: Session, contact_number: str, message: str) -> tuple[str, bool]:
+def process_message(db: Session, contact_number: str, message: str, reviews_db: Session | None = None) -> tuple[str, bool]:
     """
     Process incoming message and return response text and completion status.
+
+    `db` holds the contact's conversation state (its shard); completed reviews
+    are saved through `reviews_db`, which defaults to `db`.
     
     Returns:
         tuple: (response_message, is_completed)
@@ -126,8 +133,11 @@ def process_message(db: Session, contact_number: str, message: str) -> tuple[str
             current_step=ConversationStep.WAITING_NAME
         )
         state = create_conversation_state(db, state_data)
+        tag_request(conversation_step=state.current_step)
         return "Hello! Thank you for contacting us. To get started, please provide your name.", False
     
+    tag_request(conversation_step=state.current_step)
+
     # Process based on current step
     if state.current_step == ConversationStep.WAITING_NAME:
         is_valid, error_msg = _is_valid_name(message)
@@ -182,7 +192,7 @@ def process_message(db: Session, contact_number: str, message: str) -> tuple[str
             return "What is your preferred contact method? (e.g., WhatsApp, Email, Phone)", False
         else:
             # Complete conversation and save review
-            response_text, _ = _complete_conversation(db, state)
+            response_text, _ = _complete_conversation(db, state, reviews_db or db)
             return response_text, True
     
     elif state.current_step == ConversationStep.WAITING_CONTACT_METHOD:
@@ -195,7 +205,7 @@ def process_message(db: Session, contact_number: str, message: str) -> tuple[str
             current_step=ConversationStep.COMPLETED
         )
         update_conversation_state(db, contact_number, update_data)
-        response_text, _ = _complete_conversation(db, state)
+        response_text, _ = _complete_conversation(db, state, reviews_db or db)
         return response_text, True
     
     elif state.current_step == ConversationStep.COMPLETED:
@@ -204,7 +214,7 @@ def process_message(db: Session, contact_number: str, message: str) -> tuple[str
     return "I didn't understand that. Please try again.", False
 
 
-def _complete_conversation(db: Session, state) -> tuple[str, bool]:
+def _complete_conversation(db: Session, state, reviews_db: Session) -> tuple[str, bool]:
     """Complete the conversation and save the review. Returns (response_message, is_completed)."""
     # Get updated state
     updated_state = get_conversation_state(db, state.contact_number)
@@ -222,10 +232,12 @@ def _complete_conversation(db: Session, state) -> tuple[str, bool]:
     )
     
     try:
-        create_review(db, review_data)
+        # create_review also publishes the "created" event to the live review feed
+        create_review(reviews_db, review_data)
         return "Thank you for your review! Your feedback has been saved successfully. We appreciate your time.", True
     except Exception as e:
-        print(f"Error saving review: {e}")
+        # Only the exception type: database errors embed the review text in their message
+        logger.error("Error saving review", extra={"error_type": type(e).__name__})
         return "An error occurred while saving your review. Please try again by typing 'restart'.", False
 
 
@@ -0,0 +1,225 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from collections import deque
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal, engine
+from app.schemas.review import ReviewResponse
+
+logger = logging.getLogger(__name__)
+
+REVIEW_EVENTS_BACKLOG = int(os.getenv("REVIEW_EVENTS_BACKLOG", "1000"))
+REVIEW_EVENTS_CLIENT_QUEUE = int(os.getenv("REVIEW_EVENTS_CLIENT_QUEUE", "100"))
+# Set to a channel name to share events between workers through Postgres LISTEN/NOTIFY
+REVIEW_EVENTS_PG_CHANNEL = os.getenv("REVIEW_EVENTS_PG_CHANNEL", "")
+
+# NOTIFY payloads are limited to 8000 bytes
+_NOTIFY_MAX_BYTES = 7900
+
+WORKER_ID = uuid.uuid4().hex
+
+
+class ReviewEventBroker:
+    """
+    In-process pub/sub for review changes feeding the SSE stream.
+
+    Events are serialized once when published and shared by all subscribers. The
+    last REVIEW_EVENTS_BACKLOG events are kept so clients can resume from their
+    Last-Event-ID. Each subscriber has a bounded queue; a client that falls that
+    far behind is disconnected and will resume from where it stopped.
+
+    Event ids are nanosecond timestamps assigned by the worker where the review
+    was written, and relayed events keep them, so a client can resume on any
+    worker. The backlog is kept ordered by id.
+    """
+
+    def __init__(self, backlog: int, client_queue: int):
+        self.client_queue = client_queue
+        self._backlog: deque[tuple[int, str]] = deque(maxlen=backlog)
+        # Subscriber queue -> sequence number of the last event published before it
+        # subscribed; those were replayed (or predate the subscription)
+        self._subscribers: dict[asyncio.Queue, int] = {}
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._sequence = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.dropped_clients = 0
+
+    def next_id(self) -> int:
+        """Reserve the id of an event published later (e.g. once its transaction commits)."""
+        with self._lock:
+            self._last_id = max(self._last_id + 1, time.time_ns())
+            return self._last_id
+
+    def _add_to_backlog(self, event_id: int, message: str) -> None:
+        if not self._backlog or event_id > self._backlog[-1][0]:
+            self._backlog.append((event_id, message))
+            return
+        # Published out of id order: relayed from another worker, or committed late
+        index = bisect.bisect(self._backlog, event_id, key=lambda item: item[0])
+        if len(self._backlog) == self._backlog.maxlen:
+            if index == 0:
+                return
+            self._backlog.popleft()
+            index -= 1
+        self._backlog.insert(index, (event_id, message))
+
+    def publish(self, event_type: str, data: dict, event_id: int | None = None) -> int:
+        """Publish an event from any thread; returns its id."""
+        if event_id is None:
+            event_id = self.next_id()
+        message = f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+        with self._lock:
+            # Local ids stay above every id seen, relayed ones included
+            self._last_id = max(self._last_id, event_id)
+            self._add_to_backlog(event_id, message)
+            self._sequence += 1
+            sequence = self._sequence
+            loop = self._loop
+        if loop is not None and self._subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, sequence, message)
+            except RuntimeError:
+                # The loop that served the subscribers is gone
+                self._loop = None
+        return event_id
+
+    def _deliver(self, sequence: int, message: str) -> None:
+        for queue, subscribed_at in list(self._subscribers.items()):
+            if sequence <= subscribed_at:
+                # Subscribed between publish and delivery: already replayed (or older
+                # than the subscription)
+                continue
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: disconnect it instead of buffering without bound
+                self._subscribers.pop(queue, None)
+                queue.get_nowait()
+                queue.put_nowait(None)
+                self.dropped_clients += 1
+
+    def subscribe(self, last_event_id: str | None = None) -> asyncio.Queue:
+        """Register a subscriber on the running loop, replaying events after last_event_id."""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.client_queue)
+        with self._lock:
+            if last_event_id and last_event_id.isdigit():
+                after = int(last_event_id)
+                missed = [message for event_id, message in self._backlog if event_id > after]
+                # Too far behind to replay: only the most recent events fit in the queue
+                for message in missed[-self.client_queue:]:
+                    queue.put_nowait(message)
+            self._subscribers[queue] = self._sequence
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.pop(queue, None)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "dropped_clients": self.dropped_clients}
+
+
+broker = ReviewEventBroker(REVIEW_EVENTS_BACKLOG, REVIEW_EVENTS_CLIENT_QUEUE)
+
+
+def _notify(db: Session, event_id: int, event_type: str, data: dict) -> None:
+    payload = json.dumps({"origin": WORKER_ID, "id": event_id, "type": event_type, "data": data}, default=str)
+    if len(payload.encode()) > _NOTIFY_MAX_BYTES:
+        # Too big for NOTIFY: send the id only and let the other workers load the review
+        payload = json.dumps(
+            {"origin": WORKER_ID, "id": event_id, "type": event_type, "review_id": data["review_id"]}
+        )
+    # Part of the write's transaction: Postgres delivers it only if the write commits
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": REVIEW_EVENTS_PG_CHANNEL, "payload": payload},
+    )
+
+
+def publish_review_event(db: Session, event_type: str, review=None, review_id: int | None = None) -> None:
+    """
+    Publish a created/updated review (ORM object) or a deleted review id once the
+    session's transaction commits. Call it after the change is flushed.
+    """
+    if review is not None:
+        data = ReviewResponse.model_validate(review).model_dump(mode="json")
+    else:
+        data = {"review_id": review_id}
+    event_id = broker.next_id()
+    if REVIEW_EVENTS_PG_CHANNEL:
+        _notify(db, event_id, event_type, data)
+    db.info.setdefault("review_events", []).append((event_id, event_type, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_events(session: Session) -> None:
+    for event_id, event_type, data in session.info.pop("review_events", ()):
+        broker.publish(event_type, data, event_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_events(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop("review_events", None)
+
+
+def _handle_notification(payload: str) -> None:
+    event = json.loads(payload)
+    if event["origin"] == WORKER_ID:
+        return
+    data = event.get("data")
+    if data is None:
+        from app.controllers.reviews_crud import get_review
+
+        db = SessionLocal()
+        try:
+            review = get_review(db, event["review_id"])
+            if review is None:
+                return
+            data = ReviewResponse.model_validate(review).model_dump(mode="json")
+        finally:
+            db.close()
+    # Same id as on the origin worker, so Last-Event-ID means the same everywhere
+    broker.publish(event["type"], data, event.get("id"))
+
+
+def _listen_forever() -> None:
+    while True:
+        connection = None
+        try:
+            cargs, cparams = engine.dialect.create_connect_args(engine.url)
+            connection = engine.dialect.dbapi.connect(*cargs, **cparams)
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{REVIEW_EVENTS_PG_CHANNEL}"')
+            while True:
+                if select.select([connection], [], [], 30) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    _handle_notification(connection.notifies.pop(0).payload)
+        except Exception as e:
+            logger.error("Review event listener failed, reconnecting", extra={"error_type": type(e).__name__})
+            if connection is not None:
+                connection.close()
+            time.sleep(5)
+
+
+def start_review_event_bridge() -> None:
+    """Start the LISTEN thread when REVIEW_EVENTS_PG_CHANNEL is configured (psycopg2 only)."""
+    if not REVIEW_EVENTS_PG_CHANNEL:
+        return
+    if engine.dialect.driver != "psycopg2":
+        logger.warning("REVIEW_EVENTS_PG_CHANNEL requires PostgreSQL with psycopg2; bridge disabled")
+        return
+    threading.Thread(target=_listen_forever, name="review-events-listener", daemon=True).start()
@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp()
+
+# The tests run against a throwaway SQLite database, never the one in .env
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL",
+    f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}",
+)
+os.environ["IMPORT_REJECTS_DIR"] = os.path.join(_tmp_dir, "import_rejects")
+
+# Conversations in the tests are sent faster than any person types
+os.environ.setdefault("CONTACT_BURST", "1000")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database.database import Base, engine
+from app.database.query_counter import assert_max_queries as _assert_max_queries
+from app.models.allModels import allModels  # noqa: F401 (registers the tables)
+
+# test_conn.py is a manual connectivity script, not a test
+collect_ignore = ["test_conn.py"]
+
+
+@pytest.fixture
+def client():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    from app.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Usage: `with assert_max_queries(4): ...`"""
+    return _assert_max_queries
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.middleware.admission import AdmissionController, AdmissionRejected, ContactRateLimiter
+
+
+def test_controller_sheds_when_queue_is_full():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=1)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.stats()["queue_depth"] == 1
+
+        with pytest.raises(AdmissionRejected, match="queue_full"):
+            await controller.acquire()
+
+        controller.release()
+        await waiter
+        assert controller.stats()["active"] == 1
+        assert controller.shed["queue_full"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_controller_sheds_after_queue_timeout():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=5, queue_timeout=0.01)
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected, match="queue_timeout"):
+            await controller.acquire()
+        assert controller.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_contact_rate_limiter_is_per_contact():
+    limiter = ContactRateLimiter(rate=0, burst=2, max_contacts=10)
+    assert limiter.allow("a") and limiter.allow("a")
+    assert not limiter.allow("a")
+    assert limiter.allow("b")
+
+
+def test_saturated_reviews_api_returns_503(client, monkeypatch):
+    from app.middleware import admission
+
+    monkeypatch.setattr(admission, "admission_controller", AdmissionController(0, 0, 0.01))
+    response = client.get("/reviews/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+
+def test_saturated_webhook_answers_with_twiml(client, monkeypatch):
+    from app.middleware import admission
+
+    monkeypatch.setattr(admission, "admission_controller", AdmissionController(0, 0, 0.01))
+    response = client.post("/twilio/webhook", data={"Body": "hi", "From": "whatsapp:+15550003333"})
+    assert response.status_code == 200
+    assert "Please wait" in response.text
+
+
+def test_queued_webhooks_are_shed_on_time_while_one_is_processing(client, monkeypatch):
+    import time
+
+    import httpx
+
+    from app.main import app
+    from app.middleware import admission
+    from app.routes import twilio_webhook
+
+    def slow_process_message(db, contact_number, message, reviews_db=None):
+        time.sleep(0.5)
+        return "ok", False
+
+    monkeypatch.setattr(admission, "admission_controller", AdmissionController(1, 10, 0.05))
+    monkeypatch.setattr(twilio_webhook, "process_message", slow_process_message)
+
+    async def post(http, number):
+        started = time.perf_counter()
+        response = await http.post("/twilio/webhook", data={"Body": "hi", "From": f"whatsapp:+1555000{number:04d}"})
+        return response, time.perf_counter() - started
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            slow = asyncio.create_task(post(http, 0))
+            await asyncio.sleep(0.1)
+            shed = await asyncio.gather(*(post(http, number) for number in range(1, 4)))
+            return await slow, shed
+
+    (slow_response, _), shed = asyncio.run(scenario())
+    assert "ok" in slow_response.text
+    for response, elapsed in shed:
+        assert "Please wait" in response.text
+        assert elapsed < 0.3
@@ -0,0 +1,62 @@
+import contextvars
+import logging
+import queue
+
+from app import logging_config
+from app.logging_config import ContextFilter, NonBlockingQueueHandler, SamplingFilter, _parse_sample_rates
+from app.middleware.request_context import start_request_tags
+
+
+def make_record(level=logging.INFO, **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, "message", None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_context_filter_redacts_fields_and_adds_request_ids():
+    def run():
+        start_request_tags().update(request_id="req-1", contact_id="abc")
+        record = make_record(message_body="hello", product_review="great product", user_name="Ana")
+        assert ContextFilter().filter(record)
+        return record
+
+    record = contextvars.copy_context().run(run)
+    assert record.message_body == "[redacted len=5]"
+    assert record.product_review == "[redacted len=13]"
+    assert record.user_name == "Ana"
+    assert (record.request_id, record.contact_id) == ("req-1", "abc")
+
+
+def test_parse_sample_rates():
+    assert _parse_sample_rates("debug=0.01, INFO=0.5,bogus") == {logging.DEBUG: 0.01, logging.INFO: 0.5}
+    assert _parse_sample_rates("") == {}
+
+
+def test_sampling_filter_only_samples_configured_levels():
+    sampling = SamplingFilter({logging.DEBUG: 0.0, logging.INFO: 1.0})
+    assert not sampling.filter(make_record(logging.DEBUG))
+    assert sampling.filter(make_record(logging.INFO))
+    assert sampling.filter(make_record(logging.ERROR))
+
+
+def test_queue_handler_drops_when_full_and_reports_the_drops():
+    log_queue = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+    for _ in range(3):
+        handler.handle(make_record())
+    assert handler.dropped == 2
+    assert log_queue.qsize() == 1
+
+    log_queue.get_nowait()
+    handler.handle(make_record())
+    report = log_queue.get_nowait()
+    assert report.levelno == logging.WARNING
+    assert report.dropped_records == 2
+
+def test_contact_hash_is_keyed(monkeypatch):
+    monkeypatch.setattr(logging_config, "LOG_CONTACT_HASH_KEY", "key-1")
+    first = logging_config.hash_contact("+15550001111")
+    assert first == logging_config.hash_contact("+15550001111")
+    monkeypatch.setattr(logging_config, "LOG_CONTACT_HASH_KEY", "key-2")
+    assert logging_config.hash_contact("+15550001111") != first
@@ -0,0 +1,98 @@
+import json
+import pstats
+import threading
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import profiler
+from app.middleware.request_context import tag_request
+
+
+def slow_review_query():
+    return sum(range(1000))
+
+
+def build_client(monkeypatch, tmp_path, mode):
+    monkeypatch.setattr(profiler, "PROFILE_SECRET", "secret")
+    monkeypatch.setattr(profiler, "PROFILE_MODE", mode)
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiler, "PROFILE_SAMPLE_INTERVAL_MS", 1)
+
+    # Routers are built after patching: profile_in_worker checks the settings once
+    router = APIRouter(route_class=profiler.ProfiledRoute)
+
+    @router.get("/sync")
+    def sync_endpoint():
+        return {"total": slow_review_query()}
+
+    @router.get("/sleepy")
+    def sleepy_endpoint():
+        time.sleep(0.05)
+        return {}
+
+    @router.get("/webhook")
+    async def async_endpoint():
+        tag_request(conversation_step="waiting_name")
+        return {"total": slow_review_query()}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(profiler.ProfilerMiddleware)
+    return TestClient(app)
+
+
+def profiled_functions(path):
+    return {name for _, _, name in pstats.Stats(str(path)).stats}
+
+
+def test_deterministic_mode_profiles_threadpool_endpoints(monkeypatch, tmp_path):
+    client = build_client(monkeypatch, tmp_path, "deterministic")
+    client.get("/sync", headers={profiler.PROFILE_HEADER: "secret"})
+
+    [profile] = tmp_path.iterdir()
+    assert "step-" not in profile.name
+    assert "slow_review_query" in profiled_functions(profile)
+
+
+def test_profiles_are_only_written_for_the_secret(monkeypatch, tmp_path):
+    client = build_client(monkeypatch, tmp_path, "deterministic")
+    client.get("/sync")
+    client.get("/sync", headers={profiler.PROFILE_HEADER: "wrong"})
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_is_tagged_with_the_conversation_step(monkeypatch, tmp_path):
+    client = build_client(monkeypatch, tmp_path, "deterministic")
+    client.get("/webhook", headers={profiler.PROFILE_HEADER: "secret"})
+
+    [profile] = tmp_path.iterdir()
+    assert "_step-waiting-name_" in profile.name
+    assert "slow_review_query" in profiled_functions(profile)
+
+
+def test_sampling_mode_only_samples_the_request_threads(monkeypatch, tmp_path):
+    client = build_client(monkeypatch, tmp_path, "sampling")
+    stop = threading.Event()
+    unrelated = threading.Thread(target=stop.wait)
+    unrelated.start()
+    try:
+        client.get("/sleepy", headers={profiler.PROFILE_HEADER: "secret"})
+    finally:
+        stop.set()
+        unrelated.join()
+
+    [profile] = tmp_path.iterdir()
+    assert profile.name.endswith(".speedscope.json")
+    with open(profile) as f:
+        data = json.load(f)
+    frame_names = [frame["name"] for frame in data["shared"]["frames"]]
+    sampled = {p["name"]: p["samples"] for p in data["profiles"]}
+
+    assert not any(name.endswith(f"(thread {unrelated.ident})") for name in sampled)
+    assert any(
+        "sleepy_endpoint" in [frame_names[i] for i in stack]
+        for samples in sampled.values()
+        for stack in samples
+    )
@@ -0,0 +1,119 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database.database import SessionLocal, engine
+from app.database.query_counter import QUERY_BUDGETS, QueryBudgetExceeded, install_query_counter, normalize_sql
+from app.middleware.query_count import QUERY_COUNT_HEADER, QueryCountMiddleware
+from app.models.review import Review
+
+WEBHOOK = "/twilio/webhook"
+PHONE = "whatsapp:+15550001111"
+
+
+def send(client, body):
+    response = client.post(WEBHOOK, data={"Body": body, "From": PHONE})
+    assert response.status_code == 200
+    return response
+
+
+def budget(key):
+    return QUERY_BUDGETS[key]
+
+
+@pytest.mark.parametrize("wants_contact", ["yes", "no"])
+def test_webhook_steps_stay_within_budget(client, assert_max_queries, wants_contact):
+    steps = [
+        ("hi", "POST /twilio/webhook:waiting_name"),  # new contact
+        ("John Doe", "POST /twilio/webhook:waiting_name"),
+        ("Widget", "POST /twilio/webhook:waiting_product_name"),
+        ("Works great, very happy with it", "POST /twilio/webhook:waiting_product_review"),
+        (wants_contact, "POST /twilio/webhook:waiting_contact_again"),
+    ]
+    if wants_contact == "yes":
+        steps.append(("Email", "POST /twilio/webhook:waiting_contact_method"))
+    steps.append(("hello again", "POST /twilio/webhook:completed"))
+    steps.append(("restart", "POST /twilio/webhook"))
+
+    for body, key in steps:
+        with assert_max_queries(budget(key)):
+            send(client, body)
+
+
+def test_review_endpoints_stay_within_budget(client, assert_max_queries):
+    payload = {
+        "contact_number": "+15550002222",
+        "user_name": "Jane Doe",
+        "product_name": "Gadget",
+        "product_review": "Does what it says",
+    }
+
+    with assert_max_queries(budget("POST /reviews/")):
+        review_id = client.post("/reviews/", json=payload).json()["review_id"]
+    with assert_max_queries(budget("GET /reviews/")):
+        assert len(client.get("/reviews/").json()) == 1
+    with assert_max_queries(budget("GET /reviews/{review_id}")):
+        assert client.get(f"/reviews/{review_id}").status_code == 200
+    with assert_max_queries(budget("GET /reviews/timeseries")):
+        assert len(client.get("/reviews/timeseries").json()) == 1
+    with assert_max_queries(budget("PUT /reviews/{review_id}")):
+        assert client.put(f"/reviews/{review_id}", json=payload).status_code == 200
+    with assert_max_queries(budget("PUT /reviews/{review_id}")):
+        # Changing the product also moves the review between rollup buckets
+        moved = {**payload, "product_name": "Widget"}
+        assert client.put(f"/reviews/{review_id}", json=moved).status_code == 200
+    with assert_max_queries(budget("DELETE /reviews/{review_id}")):
+        assert client.delete(f"/reviews/{review_id}").status_code == 200
+
+
+def test_assert_max_queries_reports_extra_queries(client, assert_max_queries):
+    with pytest.raises(QueryBudgetExceeded, match="at most 0 queries"):
+        with assert_max_queries(0):
+            client.get("/reviews/")
+
+
+def lookup_reviews_one_by_one(ids):
+    db = SessionLocal()
+    try:
+        return [db.query(Review).filter(Review.review_id == review_id).first() for review_id in ids]
+    finally:
+        db.close()
+
+
+def test_assert_max_queries_reports_repeated_statements(client, assert_max_queries):
+    with pytest.raises(QueryBudgetExceeded, match=r"Possible N\+1.*\n  5x SELECT"):
+        with assert_max_queries(10, max_repeats=3):
+            lookup_reviews_one_by_one(range(5))
+
+
+def test_normalize_sql_ignores_literals_and_in_list_length():
+    assert normalize_sql("SELECT * FROM t WHERE id IN (?, ?) AND name = 'a'") == normalize_sql(
+        "SELECT *\nFROM t WHERE id IN (?) AND name = 'b'"
+    )
+
+
+def test_debug_middleware_reports_query_count_and_n_plus_one(client, monkeypatch, caplog):
+    from app.routes.reviews_router import router
+
+    install_query_counter(engine)
+    debug_app = FastAPI()
+    debug_app.add_middleware(QueryCountMiddleware)
+    debug_app.include_router(router)
+
+    @debug_app.get("/n-plus-one")
+    def n_plus_one():
+        return len(lookup_reviews_one_by_one(range(5)))
+
+    # setup_logging stops "app" records at its own handler
+    monkeypatch.setattr(logging.getLogger("app"), "propagate", True)
+    debug_client = TestClient(debug_app)
+
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_count"):
+        assert debug_client.get("/reviews/").headers[QUERY_COUNT_HEADER] == "1"
+        assert not caplog.records
+
+        response = debug_client.get("/n-plus-one")
+    assert response.headers[QUERY_COUNT_HEADER] == "5"
+    assert "Possible N+1 in GET /n-plus-one" in caplog.text
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import threading
+
+from sqlalchemy import text
+
+from app.service.review_events import ReviewEventBroker, broker
+
+PAYLOAD = {
+    "contact_number": "+15550004444",
+    "user_name": "Ana Perez",
+    "product_name": "Widget",
+    "product_review": "Works well",
+}
+
+
+def test_events_published_from_other_threads_reach_subscribers():
+    async def scenario():
+        events = ReviewEventBroker(backlog=10, client_queue=10)
+        queue = events.subscribe()
+        thread = threading.Thread(target=events.publish, args=("created", {"review_id": 1}))
+        thread.start()
+        thread.join()
+        message = await asyncio.wait_for(queue.get(), 1)
+        assert "event: created" in message
+        assert '"review_id": 1' in message
+
+    asyncio.run(scenario())
+
+
+def test_subscriber_resumes_after_last_event_id():
+    async def scenario():
+        events = ReviewEventBroker(backlog=10, client_queue=10)
+        for review_id in (1, 2, 3):
+            events.publish("created", {"review_id": review_id})
+        first_id = events._backlog[0][0]
+
+        queue = events.subscribe(str(first_id))
+        replayed = [queue.get_nowait() for _ in range(queue.qsize())]
+        assert ['"review_id": 2' in replayed[0], '"review_id": 3' in replayed[1]] == [True, True]
+
+    asyncio.run(scenario())
+
+
+def test_event_replayed_on_subscribe_is_not_delivered_again():
+    async def scenario():
+        events = ReviewEventBroker(backlog=10, client_queue=10)
+        events.subscribe()
+        events.publish("created", {"review_id": 1})
+        before = events._backlog[0][0]
+        events.publish("created", {"review_id": 2})
+
+        # Resumes after publish but before the loop ran the pending deliveries
+        queue = events.subscribe(str(before - 1))
+        await asyncio.sleep(0)
+
+        messages = [queue.get_nowait() for _ in range(queue.qsize())]
+        assert len(messages) == 2
+        assert '"review_id": 1' in messages[0] and '"review_id": 2' in messages[1]
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_is_disconnected():
+    async def scenario():
+        events = ReviewEventBroker(backlog=10, client_queue=2)
+        queue = events.subscribe()
+        for review_id in range(3):
+            events.publish("created", {"review_id": review_id})
+        await asyncio.sleep(0)
+
+        messages = [queue.get_nowait() for _ in range(queue.qsize())]
+        assert messages[-1] is None
+        assert events.stats() == {"subscribers": 0, "dropped_clients": 1}
+
+    asyncio.run(scenario())
+
+
+def test_review_crud_publishes_events(client):
+    review_id = client.post("/reviews/", json=PAYLOAD).json()["review_id"]
+    client.delete(f"/reviews/{review_id}")
+
+    created, deleted = [message for _, message in list(broker._backlog)[-2:]]
+    assert "event: created" in created and "Ana Perez" in created
+    assert "event: deleted" in deleted and f'"review_id": {review_id}' in deleted
+
+
+def test_relayed_events_keep_their_id_and_the_backlog_stays_ordered():
+    async def scenario():
+        events = ReviewEventBroker(backlog=10, client_queue=10)
+        first = events.publish("created", {"review_id": 1})
+        second = events.publish("created", {"review_id": 2})
+        # Published earlier on another worker, relayed here late
+        assert events.publish("created", {"review_id": 3}, first + 1) == first + 1
+
+        assert [event_id for event_id, _ in events._backlog] == [first, first + 1, second]
+        assert events.next_id() > second
+
+        queue = events.subscribe(str(first))
+        replayed = [queue.get_nowait() for _ in range(queue.qsize())]
+        assert [message.split("\n")[0] for message in replayed] == [f"id: {first + 1}", f"id: {second}"]
+
+    asyncio.run(scenario())
+
+
+def test_notifications_from_other_workers_are_published_under_the_origin_id(monkeypatch):
+    from app.service import review_events
+
+    events = ReviewEventBroker(backlog=10, client_queue=10)
+    monkeypatch.setattr(review_events, "broker", events)
+    review_events._handle_notification(
+        json.dumps({"origin": "other-worker", "id": 42, "type": "deleted", "data": {"review_id": 7}})
+    )
+    assert events._backlog[-1][0] == 42
+
+
+def test_events_of_rolled_back_writes_are_not_published(client, monkeypatch):
+    from app.service import review_events
+    from app.database.database import SessionLocal
+
+    events = ReviewEventBroker(backlog=10, client_queue=10)
+    monkeypatch.setattr(review_events, "broker", events)
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))  # a write in progress
+        review_events.publish_review_event(db, "deleted", review_id=1)
+        db.rollback()
+        db.commit()
+    finally:
+        db.close()
+    assert len(events._backlog) == 0
+
+
+async def open_stream(app, last_event_id=None):
+    """Drive GET /reviews/stream directly over ASGI; returns (chunks, disconnect, task)."""
+    headers = [(b"accept", b"text/event-stream")]
+    if last_event_id:
+        headers.append((b"last-event-id", last_event_id.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/reviews/stream", "raw_path": b"/reviews/stream", "root_path": "",
+        "query_string": b"", "headers": headers, "client": ("test", 1), "server": ("test", 80),
+    }
+    chunks: asyncio.Queue = asyncio.Queue()
+    disconnect = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            await chunks.put(message["body"].decode())
+
+    return chunks, disconnect, asyncio.create_task(app(scope, receive, send))
+
+
+def test_stream_endpoint_replays_missed_events_and_cleans_up_on_disconnect(client, monkeypatch):
+    from app.main import app
+    from app.routes import reviews_stream
+    from app.service import review_events
+
+    events = ReviewEventBroker(backlog=10, client_queue=10)
+    monkeypatch.setattr(review_events, "broker", events)
+    monkeypatch.setattr(reviews_stream, "broker", events)
+    first = client.post("/reviews/", json=PAYLOAD).json()["review_id"]
+    client.delete(f"/reviews/{first}")
+    created_id = events._backlog[0][0]
+
+    async def scenario():
+        chunks, disconnect, task = await open_stream(app, str(created_id))
+        received = ""
+        while "event: deleted" not in received:
+            received += await asyncio.wait_for(chunks.get(), 1)
+        assert "event: created" not in received
+        assert events.stats()["subscribers"] == 1
+
+        disconnect.set()
+        await asyncio.wait_for(task, 1)
+        assert events.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+from app.database.query_counter import assert_max_queries
+
+PAYLOAD = {
+    "contact_number": "+15550005555",
+    "user_name": "Ana Perez",
+    "product_name": "Widget",
+    "product_review": "A long review that list consumers do not need",
+}
+
+
+def test_list_returns_only_requested_fields(client):
+    client.post("/reviews/", json=PAYLOAD)
+    response = client.get("/reviews/", params={"fields": "product_name, review_id"})
+
+    assert response.status_code == 200
+    assert response.json() == [{"review_id": 1, "product_name": "Widget"}]
+
+
+def test_detail_returns_only_requested_fields(client):
+    review_id = client.post("/reviews/", json=PAYLOAD).json()["review_id"]
+    response = client.get(f"/reviews/{review_id}", params={"fields": "created_at"})
+
+    assert list(response.json()) == ["created_at"]
+    assert client.get("/reviews/999", params={"fields": "created_at"}).status_code == 404
+
+
+def test_projection_is_pushed_into_the_select(client):
+    client.post("/reviews/", json=PAYLOAD)
+    with assert_max_queries(1) as statements:
+        client.get("/reviews/", params={"fields": "review_id,product_name"})
+    assert "product_review" not in statements[0]
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/reviews/", params={"fields": "review_id,password"})
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
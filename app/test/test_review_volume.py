@@ -0,0 +1,88 @@
+import io
+
+from app.controllers.review_volume_crud import rebuild_review_volume
+from app.controllers.reviews_import import import_reviews, iter_import_rows
+from app.database.database import engine
+
+CSV_INPUT = """contact_number,user_name,product_name,product_review,created_at
++15550000001,Ana Perez,Widget,Works well,2024-03-01T10:05:00
++15550000002,Luis Gomez,Widget,Works well,2024-03-01T10:55:00
++15550000003,Eva Ruiz,Widget,Works well,2024-03-01T11:30:00
++15550000004,Eva Ruiz,Gadget,Works well,2024-03-02T09:00:00
+"""
+
+
+def timeseries(client, **params):
+    response = client.get("/reviews/timeseries", params=params)
+    assert response.status_code == 200
+    return [(p["bucket_start"], p["product_name"], p["review_count"]) for p in response.json()]
+
+
+def test_imported_reviews_update_the_rollups(client):
+    import_reviews(engine, iter_import_rows(io.StringIO(CSV_INPUT), "csv"))
+
+    assert timeseries(client, bucket="hour", product="Widget") == [
+        ("2024-03-01T10:00:00", "Widget", 2),
+        ("2024-03-01T11:00:00", "Widget", 1),
+    ]
+    assert timeseries(client, bucket="day") == [
+        ("2024-03-01T00:00:00", "Widget", 3),
+        ("2024-03-02T00:00:00", "Gadget", 1),
+    ]
+    assert timeseries(client, bucket="day", start="2024-03-02T00:00:00") == [
+        ("2024-03-02T00:00:00", "Gadget", 1),
+    ]
+
+
+def test_review_writes_keep_the_rollups_in_sync(client):
+    payload = {"contact_number": "+1", "user_name": "Ana", "product_name": "Widget", "product_review": "Nice"}
+    first = client.post("/reviews/", json=payload).json()["review_id"]
+    second = client.post("/reviews/", json=payload).json()["review_id"]
+    client.put(f"/reviews/{second}", json={**payload, "product_name": "Gadget"})
+    client.delete(f"/reviews/{first}")
+
+    counts = {product: count for _, product, count in timeseries(client, bucket="day")}
+    assert counts == {"Gadget": 1}
+
+
+def test_backfill_matches_incremental_rollups(client):
+    import_reviews(engine, iter_import_rows(io.StringIO(CSV_INPUT), "csv"))
+    incremental = {bucket: timeseries(client, bucket=bucket) for bucket in ("hour", "day")}
+
+    with engine.begin() as connection:
+        assert rebuild_review_volume(connection) == 5
+
+    assert {bucket: timeseries(client, bucket=bucket) for bucket in ("hour", "day")} == incremental
+
+
+def test_unknown_bucket_is_rejected(client):
+    assert client.get("/reviews/timeseries", params={"bucket": "week"}).status_code == 422
+
+
+
+def test_rollup_upserts_lock_buckets_in_a_fixed_order(client):
+    from datetime import datetime
+
+    from sqlalchemy import event
+
+    from app.controllers.review_volume_crud import move_review_volume
+    from app.database.database import SessionLocal
+
+    parameters = []
+
+    def record(conn, cursor, statement, params, context, executemany):
+        parameters.append(params)
+
+    event.listen(engine, "before_cursor_execute", record)
+    db = SessionLocal()
+    try:
+        for old, new in (("Widget", "Gadget"), ("Gadget", "Widget")):
+            parameters.clear()
+            move_review_volume(db, datetime(2024, 3, 1, 10, 30), old, new)
+            [params] = parameters
+            products = [value for value in params if value in ("Widget", "Gadget")]
+            assert products == ["Gadget", "Widget"] * 2  # day buckets, then hour buckets
+        db.rollback()
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", record)
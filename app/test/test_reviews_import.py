@@ -0,0 +1,95 @@
+import io
+import json
+
+from app.controllers.reviews_import import import_reviews, iter_import_rows
+from app.database.database import engine
+
+CSV_INPUT = """contact_number,user_name,product_name,product_review,preferred_contact_again,created_at
++15550000001,Ana Perez,Widget,Works well,true,2024-03-01T10:00:00
++15550000002,,Widget,Missing the user name,,
++15550000003,Luis Gomez,Gadget,"Quoted, with ""commas\"\"",no,
+"""
+
+
+def test_import_csv_loads_valid_rows_and_reports_rejects(client):
+    rejects = io.StringIO()
+    result = import_reviews(engine, iter_import_rows(io.StringIO(CSV_INPUT), "csv"), rejects, batch_size=2)
+
+    assert result == {"inserted": 2, "rejected": 1}
+    reject = json.loads(rejects.getvalue())
+    assert reject["line"] == 3
+    assert reject["errors"] == ["user_name: Field required"]
+
+    reviews = client.get("/reviews/").json()
+    assert [r["user_name"] for r in reviews] == ["Ana Perez", "Luis Gomez"]
+    assert reviews[0]["created_at"].startswith("2024-03-01T10:00:00")
+    assert reviews[1]["product_review"] == 'Quoted, with "commas"'
+
+
+def test_import_endpoint_accepts_ndjson(client):
+    lines = [
+        json.dumps({"contact_number": "+1", "user_name": "Ana", "product_name": "Widget", "product_review": "Nice"}),
+        "{not json",
+        json.dumps({"contact_number": "+1" * 40, "user_name": "Ana", "product_name": "Widget", "product_review": "Nice"}),
+    ]
+    response = client.post(
+        "/reviews/import",
+        files={"file": ("reviews.ndjson", "\n".join(lines).encode(), "application/x-ndjson")},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["inserted"] == 1
+    assert body["rejected"] == 2
+    with open(body["rejects_file"]) as f:
+        errors = [json.loads(line)["errors"][0] for line in f]
+    assert errors[0].startswith("invalid JSON")
+    assert errors[1] == "contact_number: longer than 64 characters"
+
+
+def ndjson(*rows):
+    return io.StringIO("\n".join(json.dumps(row) for row in rows))
+
+
+def test_import_rejects_nul_characters_and_stores_created_at_in_utc(client):
+    base = {"contact_number": "+1", "user_name": "Ana", "product_name": "Widget", "product_review": "Nice"}
+    rejects = io.StringIO()
+    result = import_reviews(engine, iter_import_rows(ndjson(
+        {**base, "created_at": "2024-03-01T10:30:00+05:00"},
+        {**base, "product_review": "Ni\u0000ce"},
+    ), "ndjson"), rejects)
+
+    assert result == {"inserted": 1, "rejected": 1}
+    assert json.loads(rejects.getvalue())["errors"] == ["product_review: contains a NUL character"]
+    [review] = client.get("/reviews/").json()
+    assert review["created_at"].startswith("2024-03-01T05:30:00")
+    [bucket] = client.get("/reviews/timeseries", params={"bucket": "hour"}).json()
+    assert bucket["bucket_start"] == "2024-03-01T05:00:00"
+
+
+def test_rows_refused_by_the_database_are_rejected_not_fatal(client, monkeypatch):
+    from sqlalchemy.exc import IntegrityError
+
+    from app.controllers import reviews_import
+
+    load = reviews_import._insert_rows
+
+    def refuse_broken(engine, rows):
+        if any(row["product_name"] == "Broken" for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("value refused"))
+        load(engine, rows)
+
+    monkeypatch.setattr(reviews_import, "_insert_rows", refuse_broken)
+    base = {"contact_number": "+1", "user_name": "Ana", "product_review": "Nice"}
+    rejects = io.StringIO()
+    result = import_reviews(engine, iter_import_rows(ndjson(
+        {**base, "product_name": "Widget"},
+        {**base, "product_name": "Broken"},
+        {**base, "product_name": "Gadget"},
+    ), "ndjson"), rejects)
+
+    assert result == {"inserted": 2, "rejected": 1}
+    reject = json.loads(rejects.getvalue())
+    assert reject["line"] == 2
+    assert reject["errors"] == ["database: value refused"]
+    assert sorted(r["product_name"] for r in client.get("/reviews/").json()) == ["Gadget", "Widget"]
@@ -0,0 +1,144 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.orm import Session
+
+from app.database.database import Base
+from app.database.query_counter import repeated_queries
+from app.database.sharding import ShardRouter, contact_key, jump_hash
+from app.models.conversation_state import ConversationState, ConversationStep
+from app.scripts.rebalance_shards import rebalance
+
+CONTACTS = [f"+1555000{i:04d}" for i in range(300)]
+
+
+def make_shards(count):
+    directory = tempfile.mkdtemp()
+    engines = [create_engine(f"sqlite:///{os.path.join(directory, f'shard{i}.db')}") for i in range(count)]
+    for shard_engine in engines:
+        Base.metadata.create_all(shard_engine)
+    return engines
+
+
+def contacts_on(shard_engine):
+    with shard_engine.connect() as connection:
+        return set(connection.scalars(select(ConversationState.contact_number)))
+
+
+def test_jump_hash_only_moves_keys_to_the_new_bucket():
+    keys = [contact_key(contact) for contact in CONTACTS]
+    before = [jump_hash(key, 3) for key in keys]
+    after = [jump_hash(key, 4) for key in keys]
+
+    moved = [(b, a) for b, a in zip(before, after) if b != a]
+    assert all(a == 3 for _, a in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.4
+    assert set(before) == {0, 1, 2}
+
+
+def test_states_are_written_to_the_contact_shard():
+    router = ShardRouter(make_shards(3))
+    for contact in CONTACTS[:30]:
+        with router.session_for(contact) as db:
+            db.add(ConversationState(contact_number=contact))
+            db.commit()
+
+    for index, shard_engine in enumerate(router.engines):
+        assert contacts_on(shard_engine) == {c for c in CONTACTS[:30] if router.shard_for(c) == index}
+
+
+def test_rebalance_moves_contacts_to_an_added_shard():
+    engines = make_shards(3)
+    old_router = ShardRouter(engines[:2])
+    for contact in CONTACTS:
+        with old_router.session_for(contact) as db:
+            db.add(ConversationState(
+                contact_number=contact, current_step=ConversationStep.WAITING_PRODUCT_NAME, user_name="Ana"
+            ))
+            db.commit()
+
+    new_router = ShardRouter(engines)
+    expected_moves = sum(1 for c in CONTACTS if new_router.shard_for(c) != old_router.shard_for(c))
+    assert rebalance(new_router, dry_run=True) == {"scanned": len(CONTACTS), "moved": expected_moves}
+    assert rebalance(new_router, batch_size=50)["moved"] == expected_moves
+
+    for index, shard_engine in enumerate(engines):
+        assert contacts_on(shard_engine) == {c for c in CONTACTS if new_router.shard_for(c) == index}
+    moved_contact = next(iter(contacts_on(engines[2])))
+    with new_router.session_for(moved_contact) as db:
+        state = db.query(ConversationState).filter(ConversationState.contact_number == moved_contact).one()
+        assert (state.user_name, state.current_step) == ("Ana", ConversationStep.WAITING_PRODUCT_NAME)
+    assert rebalance(new_router)["moved"] == 0
+
+
+def test_rebalance_keeps_the_newest_state_on_conflict():
+    engines = make_shards(2)
+    router = ShardRouter(engines[1:])
+    contact = CONTACTS[0]
+    now = datetime.utcnow()
+    with router.session_for(contact) as db:
+        db.add(ConversationState(contact_number=contact, user_name="Newer", updated_at=now))
+        db.commit()
+    with ShardRouter(engines[:1]).session_for(contact) as db:
+        db.add(ConversationState(contact_number=contact, user_name="Older", updated_at=now - timedelta(hours=1)))
+        db.commit()
+
+    assert rebalance(router, extra_sources=[engines[0]])["moved"] == 1
+    assert contacts_on(engines[0]) == set()
+    with router.session_for(contact) as db:
+        assert db.query(ConversationState).one().user_name == "Newer"
+
+
+def test_webhook_keeps_state_on_the_shard_and_review_on_the_main_database(client, monkeypatch):
+    from app.database import sharding
+
+    router = ShardRouter(make_shards(2))
+    monkeypatch.setattr(sharding, "conversation_shards", router)
+    phone = "+15550009999"
+    for body in ["hi", "Ana Perez", "Widget", "Works great, very happy", "no"]:
+        client.post("/twilio/webhook", data={"Body": body, "From": f"whatsapp:{phone}"})
+
+    assert contacts_on(router.engine_for(phone)) == {phone}
+    assert contacts_on(sharding.engine) == set()
+    assert [r["contact_number"] for r in client.get("/reviews/").json()] == [phone]
+
+
+def test_rebalance_looks_up_existing_states_once_per_target_and_batch():
+    engines = make_shards(2)
+    router = ShardRouter(engines)
+    main = make_shards(1)[0]
+    with Session(bind=main) as db:
+        db.add_all(ConversationState(contact_number=c, user_name="Ana") for c in CONTACTS[:40])
+        db.commit()
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for shard_engine in engines:
+        event.listen(shard_engine, "before_cursor_execute", record)
+    try:
+        assert rebalance(router, extra_sources=[main])["moved"] == 40
+    finally:
+        for shard_engine in engines:
+            event.remove(shard_engine, "before_cursor_execute", record)
+    assert repeated_queries(statements) == []
+
+
+def test_rebalance_handles_states_without_timestamps():
+    engines = make_shards(2)
+    router = ShardRouter(engines[1:])
+    contact = CONTACTS[0]
+    for shard_engine, name in ((engines[1], "Target"), (engines[0], "Source")):
+        with Session(bind=shard_engine) as db:
+            db.add(ConversationState(contact_number=contact, user_name=name))
+            db.flush()
+            db.execute(update(ConversationState).values(created_at=None, updated_at=None))
+            db.commit()
+
+    assert rebalance(router, extra_sources=[engines[0]])["moved"] == 1
+    with router.session_for(contact) as db:
+        assert db.query(ConversationState).one().user_name == "Target"